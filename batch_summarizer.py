@@ -0,0 +1,194 @@
+import json
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+from openai import AsyncOpenAI
+from config import config
+from logger import app_logger
+from meeting_store import DeferredJob, MeetingStore
+from summarizer import MeetingSummarizer
+
+# Called once per job with the summary text, or None if the batch failed for it.
+# Raising keeps the job queued so delivery is retried on the next poll.
+DeliveryCallback = Callable[[DeferredJob, Optional[str]], Awaitable[None]]
+
+# OpenAI Batch API completion window
+COMPLETION_WINDOW_HOURS = 24
+
+class BatchSummarizer:
+    """Collects deferred summarization requests into OpenAI Batch API submissions."""
+
+    TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+    MAX_POLL_FAILURES = 10
+
+    def __init__(self, summarizer: MeetingSummarizer, meeting_store: MeetingStore, client=None):
+        self.summarizer = summarizer
+        self.meeting_store = meeting_store
+        self.client = client or AsyncOpenAI(api_key=config.openai_api_key)
+        self.poll_interval = config.batch_poll_interval_seconds
+        self._poll_failures: Dict[str, int] = {}
+
+    @staticmethod
+    def _custom_id(job: DeferredJob) -> str:
+        return f"job-{job.id}"
+
+    async def submit_pending(self) -> Optional[str]:
+        """Submit all queued jobs as a single batch and return its id."""
+        jobs = self.meeting_store.unsubmitted_jobs()
+        if not jobs:
+            return None
+
+        lines = [
+            json.dumps({
+                "custom_id": self._custom_id(job),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self.summarizer.build_request_body(job.transcript)
+            }, ensure_ascii=False)
+            for job in jobs
+        ]
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+        input_file = await self.client.files.create(
+            file=("deferred_summaries.jsonl", payload),
+            purpose="batch"
+        )
+        try:
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window=f"{COMPLETION_WINDOW_HOURS}h"
+            )
+        except Exception:
+            # Don't leave orphaned transcripts in the OpenAI account; jobs are resubmitted next tick
+            await self._delete_files([input_file.id])
+            raise
+
+        self.meeting_store.assign_batch([job.id for job in jobs], batch.id)
+        app_logger.info(f"Submitted batch {batch.id} with {len(jobs)} deferred summaries")
+        return batch.id
+
+    async def _delete_files(self, file_ids: List[Optional[str]]):
+        """Delete uploaded and generated batch files from OpenAI storage."""
+        for file_id in file_ids:
+            if not file_id:
+                continue
+            try:
+                await self.client.files.delete(file_id)
+                app_logger.info(f"Deleted batch file {file_id}")
+            except Exception as e:
+                app_logger.error(f"Failed to delete batch file {file_id}: {str(e)}")
+
+    async def _cleanup_batch(self, batch_id: str, batch=None):
+        """Delete a finished batch's files once none of its jobs remain queued."""
+        if self.meeting_store.batch_jobs(batch_id):
+            return
+
+        try:
+            batch = batch or await self.client.batches.retrieve(batch_id)
+        except Exception as e:
+            app_logger.error(f"Failed to retrieve batch {batch_id} for file cleanup: {str(e)}")
+            return
+
+        await self._delete_files([batch.input_file_id, batch.output_file_id, batch.error_file_id])
+
+    async def _read_results(self, output_file_id: Optional[str]) -> Dict[str, str]:
+        """Map custom_id to summary for successful requests in a batch output file."""
+        if not output_file_id:
+            return {}
+
+        content = await self.client.files.content(output_file_id)
+        results = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                app_logger.warning(f"Batch request {record.get('custom_id')} failed: {record.get('error')}")
+                continue
+
+            results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+
+    async def _discard_jobs(self, jobs: List[DeferredJob], deliver: DeliveryCallback) -> int:
+        """Notify chats that their summaries failed and drop the jobs regardless of delivery."""
+        for job in jobs:
+            try:
+                await deliver(job, None)
+            except Exception as e:
+                app_logger.error(f"Failed to notify chat {job.chat_id} about deferred job {job.id}: {str(e)}")
+            finally:
+                self.meeting_store.delete_deferred_job(job.id)
+        return len(jobs)
+
+    async def poll_batches(self, deliver: DeliveryCallback) -> int:
+        """Deliver results of finished batches and return the number of jobs handled."""
+        handled = 0
+
+        for batch_id in self.meeting_store.submitted_batch_ids():
+            try:
+                batch = await self.client.batches.retrieve(batch_id)
+                if batch.status not in self.TERMINAL_STATUSES:
+                    continue
+                results = await self._read_results(batch.output_file_id)
+            except Exception as e:
+                failures = self._poll_failures.get(batch_id, 0) + 1
+                self._poll_failures[batch_id] = failures
+                app_logger.error(f"Failed to poll batch {batch_id} (attempt {failures}): {str(e)}")
+
+                if failures >= self.MAX_POLL_FAILURES:
+                    app_logger.error(f"Giving up on batch {batch_id} after {failures} failed polls")
+                    handled += await self._discard_jobs(self.meeting_store.batch_jobs(batch_id), deliver)
+                    self._poll_failures.pop(batch_id, None)
+                    await self._cleanup_batch(batch_id)
+                continue
+
+            self._poll_failures.pop(batch_id, None)
+            app_logger.info(f"Batch {batch_id} finished with status: {batch.status}")
+
+            for job in self.meeting_store.batch_jobs(batch_id):
+                try:
+                    await deliver(job, results.get(self._custom_id(job)))
+                except Exception as e:
+                    app_logger.error(f"Failed to deliver deferred summary {job.id} to chat {job.chat_id}, will retry: {str(e)}")
+                    continue
+
+                self.meeting_store.delete_deferred_job(job.id)
+                handled += 1
+
+            await self._cleanup_batch(batch_id, batch)
+
+        return handled
+
+    async def expire_stale_jobs(self, deliver: DeliveryCallback) -> int:
+        """Drop jobs older than file retention plus the batch completion window."""
+        max_age_hours = self.meeting_store.retention_hours + COMPLETION_WINDOW_HOURS
+        stale_jobs = self.meeting_store.stale_deferred_jobs(max_age_hours)
+        if stale_jobs:
+            app_logger.warning(f"Expiring {len(stale_jobs)} deferred jobs older than {max_age_hours} hours")
+        expired = await self._discard_jobs(stale_jobs, deliver)
+
+        for batch_id in sorted({job.batch_id for job in stale_jobs if job.batch_id}):
+            await self._cleanup_batch(batch_id)
+        return expired
+
+    async def start_scheduler(self, deliver: DeliveryCallback):
+        """Start background task that submits queued jobs and polls batches for completion."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+
+            try:
+                await self.submit_pending()
+            except Exception as e:
+                app_logger.error(f"Batch submission failed: {str(e)}")
+
+            try:
+                await self.poll_batches(deliver)
+            except Exception as e:
+                app_logger.error(f"Batch polling failed: {str(e)}")
+
+            try:
+                await self.expire_stale_jobs(deliver)
+            except Exception as e:
+                app_logger.error(f"Deferred job expiry failed: {str(e)}")
@@ -36,6 +36,12 @@ class Config:
     max_file_size_mb: int = int(os.getenv("MAX_FILE_SIZE_MB", "20"))  # Reduced to match Telegram limit
     file_retention_hours: int = int(os.getenv("FILE_RETENTION_HOURS", "24"))
     
+    # Meeting Archive Configuration
+    database_path: str = os.getenv("DATABASE_PATH", "./data/meetings.db")
+    
+    # Deferred (Batch API) Summarization Configuration
+    batch_poll_interval_seconds: int = int(os.getenv("BATCH_POLL_INTERVAL_SECONDS", "60"))
+    
     # Logging Configuration
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     logtail_source_token: str = os.getenv("LOGTAIL_SOURCE_TOKEN", "")
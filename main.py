@@ -1,15 +1,19 @@
 import asyncio
 import os
+from datetime import datetime
 from aiohttp import web
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.constants import ParseMode
+from telegram.error import BadRequest
 
 from config import config
 from logger import app_logger
 from audio_processor import AudioProcessor
 from summarizer import MeetingSummarizer
 from file_manager import FileManager
+from meeting_store import MeetingStore
+from batch_summarizer import BatchSummarizer
 
 class MeetingBot:
     """Main Telegram bot class for meeting summarization."""
@@ -21,6 +25,8 @@ class MeetingBot:
         self.audio_processor = AudioProcessor()
         self.summarizer = MeetingSummarizer()
         self.file_manager = FileManager()
+        self.meeting_store = MeetingStore()
+        self.batch_summarizer = BatchSummarizer(self.summarizer, self.meeting_store)
         
         # Create application
         self.application = Application.builder().token(config.telegram_bot_token).build()
@@ -35,6 +41,10 @@ class MeetingBot:
         # Command handlers
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
+        self.application.add_handler(CommandHandler("search", self.search_command))
+        self.application.add_handler(CommandHandler("recent", self.recent_command))
+        self.application.add_handler(CommandHandler("summary", self.summary_command))
+        self.application.add_handler(CommandHandler("later", self.later_command))
         
         # Audio file handler - handle both audio messages and documents with audio extensions
         self.application.add_handler(
@@ -63,6 +73,15 @@ class MeetingBot:
 • Максимальный размер: 20 МБ
 • Поддержка русского и английского языков
 
+**Архив встреч:**
+• /search <запрос> — поиск по прошлым встречам
+• /recent — последние встречи
+• /summary <номер> — повторно показать саммари
+
+**Несрочные встречи:**
+• /later — включить/выключить отложенный режим
+• Или добавьте #later в подпись к файлу
+
 Отправьте /help для получения дополнительной информации.
         """
         
@@ -74,7 +93,7 @@ class MeetingBot:
     
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command."""
-        help_message = """
+        help_message = f"""
 📖 **Помощь - Meeting Summary Bot**
 
 **Поддерживаемые форматы:**
@@ -83,7 +102,7 @@ class MeetingBot:
 **Процесс обработки:**
 1. Транскрипция с помощью OpenAI Whisper
 2. Создание саммари с помощью GPT-4
-3. Автоматическое удаление файлов через 24 часа
+3. Автоматическое удаление файлов через {config.file_retention_hours} ч.
 
 **Структура саммари:**
 • Основные темы обсуждения
@@ -95,6 +114,17 @@ class MeetingBot:
 **Время обработки:**
 Обычно 1-3 минуты в зависимости от длительности записи.
 
+**Архив встреч:**
+• /search <запрос> — найти встречи по словам из транскрипции или саммари
+• /recent — список последних встреч
+• /summary <номер> — повторно показать саммари встречи
+Транскрипции и саммари хранятся столько же, сколько файлы ({config.file_retention_hours} ч.).
+
+**Отложенный режим:**
+• /later — включить/выключить для этого чата
+• #later в подписи к файлу — отложить только эту запись
+Саммари создается пакетной обработкой OpenAI и приходит отдельным сообщением, обычно в течение нескольких часов (максимум 24 часа).
+
 По вопросам и проблемам обращайтесь к администратору.
         """
         
@@ -219,6 +249,21 @@ class MeetingBot:
                 
                 app_logger.info(f"Transcription successful for user {update.effective_user.id}, length: {len(transcript)}")
                 
+                # Non-urgent meetings are summarized via Batch API to keep interactive capacity free
+                if self._is_deferred(update):
+                    self.meeting_store.add_deferred_job(
+                        update.effective_chat.id,
+                        update.effective_user.id,
+                        filename,
+                        transcript
+                    )
+                    await processing_msg.edit_text(
+                        "📥 Транскрипция готова, саммари поставлено в очередь.\n"
+                        "⏳ Пришлю его отдельным сообщением, когда завершится пакетная обработка (до 24 часов)."
+                    )
+                    app_logger.info(f"Summary deferred for user {update.effective_user.id}")
+                    return
+                
                 # Update status
                 await processing_msg.edit_text(
                     "🔄 Создаю саммари встречи...\n"
@@ -245,6 +290,22 @@ class MeetingBot:
                     parse_mode=ParseMode.MARKDOWN
                 )
                 
+                # Archive transcript and summary for /search, /recent and /summary
+                try:
+                    meeting_id = self.meeting_store.save_meeting(
+                        update.effective_chat.id,
+                        update.effective_user.id,
+                        filename,
+                        transcript,
+                        summary
+                    )
+                    await update.message.reply_text(
+                        f"🗂 Встреча сохранена в архив под номером {meeting_id}.\n"
+                        f"Используйте /summary {meeting_id}, чтобы открыть саммари снова."
+                    )
+                except Exception as e:
+                    app_logger.error(f"Failed to archive meeting for user {update.effective_user.id}: {str(e)}")
+                
                 app_logger.info(f"Successfully processed audio for user {update.effective_user.id}")
                 
             finally:
@@ -275,6 +336,146 @@ class MeetingBot:
                     f"❌ Произошла ошибка при обработке файла: {str(e)[:200]}..."
                 )
     
+    def _is_deferred(self, update: Update) -> bool:
+        """Check whether the upload should be summarized in deferred (batch) mode."""
+        caption = update.message.caption or ""
+        return "#later" in caption.lower() or self.meeting_store.get_deferred_mode(update.effective_chat.id)
+    
+    async def later_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /later command - toggle deferred summarization for the chat."""
+        deferred_mode = not self.meeting_store.get_deferred_mode(update.effective_chat.id)
+        self.meeting_store.set_deferred_mode(update.effective_chat.id, deferred_mode)
+        
+        if deferred_mode:
+            await update.message.reply_text(
+                "🐢 Отложенный режим включен.\n"
+                "Саммари новых записей будут приходить после пакетной обработки (до 24 часов).\n"
+                "Отправьте /later еще раз, чтобы вернуться к обычному режиму."
+            )
+        else:
+            await update.message.reply_text(
+                "⚡️ Отложенный режим выключен. Саммари снова создаются сразу."
+            )
+        app_logger.info(f"Deferred mode {'enabled' if deferred_mode else 'disabled'} in chat {update.effective_chat.id}")
+    
+    async def deliver_deferred_summary(self, job, summary):
+        """Send a summary produced by batch processing to the chat and archive it."""
+        bot = self.application.bot
+        
+        if not summary:
+            await bot.send_message(
+                job.chat_id,
+                f"❌ Не удалось создать отложенное саммари для {job.filename}. Отправьте запись еще раз."
+            )
+            return
+        
+        await self._send_summary(bot, job.chat_id, summary, f"deferred summary {job.id}")
+        app_logger.info(f"Deferred summary {job.id} delivered to chat {job.chat_id}")
+        
+        # The summary is already delivered: archive failures must not trigger a resend
+        try:
+            meeting_id = self.meeting_store.save_meeting(
+                job.chat_id, job.user_id, job.filename, job.transcript, summary
+            )
+            await bot.send_message(
+                job.chat_id,
+                f"🗂 Встреча сохранена в архив под номером {meeting_id}.\n"
+                f"Используйте /summary {meeting_id}, чтобы открыть саммари снова."
+            )
+        except Exception as e:
+            app_logger.error(f"Failed to archive deferred summary {job.id}: {str(e)}")
+    
+    async def _send_summary(self, bot, chat_id: int, summary: str, log_context: str):
+        """Send a formatted summary, falling back to plain text if Telegram rejects the Markdown."""
+        formatted_summary = self.summarizer.format_summary_message(summary)
+        try:
+            await bot.send_message(chat_id, formatted_summary, parse_mode=ParseMode.MARKDOWN)
+        except BadRequest as e:
+            # Model output is not guaranteed to be valid Telegram Markdown
+            app_logger.warning(f"Markdown rejected for {log_context}, sending plain text: {str(e)}")
+            await bot.send_message(chat_id, formatted_summary)
+    
+    def _format_meeting_line(self, meeting) -> str:
+        """Format a single archived meeting for list replies."""
+        created = datetime.fromtimestamp(meeting.created_at).strftime("%d.%m.%Y %H:%M")
+        return f"#{meeting.id} · {created} · {meeting.filename}"
+    
+    async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /search command."""
+        query = " ".join(context.args or [])
+        if not query.strip():
+            await update.message.reply_text(
+                "🔎 Укажите запрос, например: /search бюджет на Q3"
+            )
+            return
+        
+        try:
+            meetings = self.meeting_store.search(update.effective_chat.id, query)
+        except Exception as e:
+            app_logger.error(f"Search failed for chat {update.effective_chat.id}: {str(e)}")
+            await update.message.reply_text("❌ Ошибка при поиске. Попробуйте еще раз.")
+            return
+        
+        if not meetings:
+            await update.message.reply_text("🔎 Ничего не найдено среди сохраненных встреч.")
+            return
+        
+        lines = [f"🔎 Найдено встреч: {len(meetings)}\n"]
+        for meeting in meetings:
+            lines.append(self._format_meeting_line(meeting))
+            lines.append(f"   {meeting.snippet}\n")
+        lines.append("Откройте саммари командой /summary <номер>.")
+        
+        # Plain text: snippets come from user content and may break Markdown
+        await update.message.reply_text("\n".join(lines))
+        app_logger.info(f"Search in chat {update.effective_chat.id} returned {len(meetings)} meetings")
+    
+    async def recent_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /recent command."""
+        try:
+            meetings = self.meeting_store.recent_meetings(update.effective_chat.id)
+        except Exception as e:
+            app_logger.error(f"Recent meetings lookup failed for chat {update.effective_chat.id}: {str(e)}")
+            await update.message.reply_text("❌ Ошибка при получении списка встреч. Попробуйте еще раз.")
+            return
+        
+        if not meetings:
+            await update.message.reply_text("🗂 В архиве пока нет встреч.")
+            return
+        
+        lines = ["🗂 Последние встречи:\n"]
+        lines.extend(self._format_meeting_line(meeting) for meeting in meetings)
+        lines.append("\nОткройте саммари командой /summary <номер>.")
+        
+        await update.message.reply_text("\n".join(lines))
+    
+    async def summary_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /summary command - re-serve an archived summary without calling OpenAI."""
+        if not context.args or not context.args[0].lstrip("#").isdigit():
+            await update.message.reply_text(
+                "🗂 Укажите номер встречи, например: /summary 12\n"
+                "Список встреч: /recent"
+            )
+            return
+        
+        meeting_id = int(context.args[0].lstrip("#"))
+        try:
+            meeting = self.meeting_store.get_meeting(update.effective_chat.id, meeting_id)
+        except Exception as e:
+            app_logger.error(f"Meeting lookup failed for chat {update.effective_chat.id}: {str(e)}")
+            await update.message.reply_text("❌ Ошибка при получении встречи. Попробуйте еще раз.")
+            return
+        
+        if not meeting:
+            await update.message.reply_text(
+                "❌ Встреча не найдена. Возможно, срок хранения истек."
+            )
+            return
+        
+        await self._send_summary(
+            context.bot, update.effective_chat.id, meeting.summary, f"archived meeting {meeting.id}"
+        )
+    
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages."""
         await update.message.reply_text(
@@ -309,6 +510,10 @@ class MeetingBot:
         
         # Start file cleanup scheduler
         asyncio.create_task(self.file_manager.start_cleanup_scheduler())
+        asyncio.create_task(self.meeting_store.start_cleanup_scheduler())
+        
+        # Start deferred summary batch scheduler
+        asyncio.create_task(self.batch_summarizer.start_scheduler(self.deliver_deferred_summary))
         
         # Start the bot
         await self.application.initialize()
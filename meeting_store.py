@@ -0,0 +1,257 @@
+import os
+import re
+import time
+import sqlite3
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional
+from config import config
+from logger import app_logger
+
+# Shortest word prefix used for search, so short words are not widened further
+MIN_STEM_LENGTH = 4
+
+@dataclass
+class MeetingRecord:
+    """A processed meeting stored in the local archive."""
+    id: int
+    chat_id: int
+    filename: str
+    created_at: float
+    summary: str
+    transcript: str = ""
+    snippet: str = ""
+
+@dataclass
+class DeferredJob:
+    """A transcribed meeting waiting for its summary from a batch submission."""
+    id: int
+    chat_id: int
+    user_id: Optional[int]
+    filename: str
+    transcript: str
+    batch_id: Optional[str]
+    created_at: float
+
+class MeetingStore:
+    """Retention-bounded SQLite archive of transcripts and summaries with FTS5 search."""
+
+    def __init__(self, db_path: Optional[str] = None, retention_hours: Optional[int] = None):
+        self.db_path = db_path or config.database_path
+        self.retention_hours = retention_hours if retention_hours is not None else config.file_retention_hours
+        self._ensure_database()
+
+    def _ensure_database(self):
+        """Create database file and schema if they don't exist."""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meetings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER NOT NULL,
+                user_id INTEGER,
+                filename TEXT NOT NULL,
+                transcript TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_meetings_chat_created
+                ON meetings (chat_id, created_at);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
+                transcript, summary, content='meetings', content_rowid='id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS meetings_ai AFTER INSERT ON meetings BEGIN
+                INSERT INTO meetings_fts (rowid, transcript, summary)
+                VALUES (new.id, new.transcript, new.summary);
+            END;
+            CREATE TRIGGER IF NOT EXISTS meetings_ad AFTER DELETE ON meetings BEGIN
+                INSERT INTO meetings_fts (meetings_fts, rowid, transcript, summary)
+                VALUES ('delete', old.id, old.transcript, old.summary);
+            END;
+
+            CREATE TABLE IF NOT EXISTS deferred_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER NOT NULL,
+                user_id INTEGER,
+                filename TEXT NOT NULL,
+                transcript TEXT NOT NULL,
+                batch_id TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_deferred_jobs_batch
+                ON deferred_jobs (batch_id);
+
+            CREATE TABLE IF NOT EXISTS chat_settings (
+                chat_id INTEGER PRIMARY KEY,
+                deferred_mode INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        self.connection.commit()
+        app_logger.info(f"Meeting store ready: {self.db_path}")
+
+    def _cutoff(self) -> float:
+        """Oldest creation timestamp still within the retention period."""
+        return time.time() - self.retention_hours * 3600
+
+    @staticmethod
+    def _build_match_query(query: str) -> str:
+        """Turn free-form user input into a safe FTS5 prefix query (all words must match).
+
+        unicode61 does no stemming, so long words are cut by up to two trailing
+        characters to let inflected Russian forms match ("бюджета" -> "бюдже*").
+        """
+        words = re.findall(r"\w+", query)
+        stems = [word[:max(MIN_STEM_LENGTH, len(word) - 2)] for word in words]
+        return " ".join(f'"{stem}"*' for stem in stems)
+
+    def save_meeting(self, chat_id: int, user_id: Optional[int], filename: str,
+                     transcript: str, summary: str) -> int:
+        """Store a processed meeting and return its id."""
+        cursor = self.connection.execute(
+            "INSERT INTO meetings (chat_id, user_id, filename, transcript, summary, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (chat_id, user_id, filename, transcript, summary, time.time())
+        )
+        self.connection.commit()
+        app_logger.info(f"Meeting {cursor.lastrowid} stored for chat {chat_id}")
+        return cursor.lastrowid
+
+    def get_meeting(self, chat_id: int, meeting_id: int) -> Optional[MeetingRecord]:
+        """Return a stored meeting of the chat, if it has not expired."""
+        row = self.connection.execute(
+            "SELECT id, chat_id, filename, created_at, summary, transcript FROM meetings "
+            "WHERE id = ? AND chat_id = ? AND created_at >= ?",
+            (meeting_id, chat_id, self._cutoff())
+        ).fetchone()
+        return MeetingRecord(**dict(row)) if row else None
+
+    def recent_meetings(self, chat_id: int, limit: int = 5) -> List[MeetingRecord]:
+        """Return the latest meetings of the chat, newest first."""
+        rows = self.connection.execute(
+            "SELECT id, chat_id, filename, created_at, summary FROM meetings "
+            "WHERE chat_id = ? AND created_at >= ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (chat_id, self._cutoff(), limit)
+        ).fetchall()
+        return [MeetingRecord(**dict(row)) for row in rows]
+
+    def search(self, chat_id: int, query: str, limit: int = 5) -> List[MeetingRecord]:
+        """Full-text search over transcripts and summaries of the chat, best matches first."""
+        match_query = self._build_match_query(query)
+        if not match_query:
+            return []
+
+        rows = self.connection.execute(
+            "SELECT m.id, m.chat_id, m.filename, m.created_at, m.summary, "
+            "snippet(meetings_fts, -1, '«', '»', '…', 12) AS snippet "
+            "FROM meetings_fts JOIN meetings m ON m.id = meetings_fts.rowid "
+            "WHERE meetings_fts MATCH ? AND m.chat_id = ? AND m.created_at >= ? "
+            "ORDER BY meetings_fts.rank LIMIT ?",
+            (match_query, chat_id, self._cutoff(), limit)
+        ).fetchall()
+        return [MeetingRecord(**dict(row)) for row in rows]
+
+    def add_deferred_job(self, chat_id: int, user_id: Optional[int], filename: str,
+                         transcript: str) -> int:
+        """Queue a transcript for deferred summarization and return the job id."""
+        cursor = self.connection.execute(
+            "INSERT INTO deferred_jobs (chat_id, user_id, filename, transcript, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (chat_id, user_id, filename, transcript, time.time())
+        )
+        self.connection.commit()
+        app_logger.info(f"Deferred job {cursor.lastrowid} queued for chat {chat_id}")
+        return cursor.lastrowid
+
+    def unsubmitted_jobs(self) -> List[DeferredJob]:
+        """Return deferred jobs not yet included in a batch, oldest first."""
+        rows = self.connection.execute(
+            "SELECT * FROM deferred_jobs WHERE batch_id IS NULL ORDER BY id"
+        ).fetchall()
+        return [DeferredJob(**dict(row)) for row in rows]
+
+    def assign_batch(self, job_ids: List[int], batch_id: str):
+        """Mark deferred jobs as submitted in the given batch."""
+        self.connection.executemany(
+            "UPDATE deferred_jobs SET batch_id = ? WHERE id = ?",
+            [(batch_id, job_id) for job_id in job_ids]
+        )
+        self.connection.commit()
+
+    def submitted_batch_ids(self) -> List[str]:
+        """Return ids of batches that still have undelivered jobs."""
+        rows = self.connection.execute(
+            "SELECT DISTINCT batch_id FROM deferred_jobs WHERE batch_id IS NOT NULL ORDER BY batch_id"
+        ).fetchall()
+        return [row["batch_id"] for row in rows]
+
+    def batch_jobs(self, batch_id: str) -> List[DeferredJob]:
+        """Return deferred jobs submitted in the given batch."""
+        rows = self.connection.execute(
+            "SELECT * FROM deferred_jobs WHERE batch_id = ? ORDER BY id", (batch_id,)
+        ).fetchall()
+        return [DeferredJob(**dict(row)) for row in rows]
+
+    def stale_deferred_jobs(self, max_age_hours: float) -> List[DeferredJob]:
+        """Return deferred jobs queued more than max_age_hours ago."""
+        rows = self.connection.execute(
+            "SELECT * FROM deferred_jobs WHERE created_at < ? ORDER BY id",
+            (time.time() - max_age_hours * 3600,)
+        ).fetchall()
+        return [DeferredJob(**dict(row)) for row in rows]
+
+    def delete_deferred_job(self, job_id: int):
+        """Remove a deferred job once its result has been delivered."""
+        self.connection.execute("DELETE FROM deferred_jobs WHERE id = ?", (job_id,))
+        self.connection.commit()
+
+    def get_deferred_mode(self, chat_id: int) -> bool:
+        """Return whether the chat has deferred (batch) summarization enabled."""
+        row = self.connection.execute(
+            "SELECT deferred_mode FROM chat_settings WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        return bool(row["deferred_mode"]) if row else False
+
+    def set_deferred_mode(self, chat_id: int, enabled: bool):
+        """Persist the deferred (batch) summarization setting of the chat."""
+        self.connection.execute(
+            "INSERT INTO chat_settings (chat_id, deferred_mode) VALUES (?, ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET deferred_mode = excluded.deferred_mode",
+            (chat_id, int(enabled))
+        )
+        self.connection.commit()
+
+    def cleanup_expired(self) -> int:
+        """Remove meetings older than retention period.
+
+        Deferred jobs are expired by BatchSummarizer.expire_stale_jobs, which also
+        notifies their chats.
+        """
+        try:
+            cursor = self.connection.execute(
+                "DELETE FROM meetings WHERE created_at < ?", (self._cutoff(),)
+            )
+            self.connection.commit()
+
+            if cursor.rowcount > 0:
+                app_logger.info(f"Meeting store cleanup completed: {cursor.rowcount} meetings removed")
+            return cursor.rowcount
+
+        except Exception as e:
+            app_logger.error(f"Meeting store cleanup failed: {str(e)}")
+            return 0
+
+    async def start_cleanup_scheduler(self):
+        """Start background task for periodic removal of expired meetings."""
+        while True:
+            await asyncio.sleep(3600)  # Run every hour
+            self.cleanup_expired()
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
@@ -12,6 +12,26 @@ class MeetingSummarizer:
         self.model = config.openai_model
         self.system_prompt = config.system_prompt
     
+    def build_request_body(self, transcript: str) -> dict:
+        """Build chat completion parameters for a transcript (shared with batch processing)."""
+        # Truncate transcript if too long (GPT-4 context limit)
+        max_transcript_length = 12000  # Conservative limit for GPT-4o-mini
+        if len(transcript) > max_transcript_length:
+            transcript = transcript[:max_transcript_length]
+            app_logger.warning(f"Transcript truncated to {max_transcript_length} characters")
+        
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": f"Создай саммари для следующей транскрипции встречи:\n\n{transcript}"}
+        ]
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.3,  # Lower temperature for more consistent summaries
+            "max_tokens": 1500   # Reasonable limit for summary length
+        }
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10)
@@ -21,22 +41,8 @@ class MeetingSummarizer:
         try:
             app_logger.info(f"Creating summary for transcript of {len(transcript)} characters")
             
-            # Truncate transcript if too long (GPT-4 context limit)
-            max_transcript_length = 12000  # Conservative limit for GPT-4o-mini
-            if len(transcript) > max_transcript_length:
-                transcript = transcript[:max_transcript_length]
-                app_logger.warning(f"Transcript truncated to {max_transcript_length} characters")
-            
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": f"Создай саммари для следующей транскрипции встречи:\n\n{transcript}"}
-            ]
-            
             response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.3,  # Lower temperature for more consistent summaries
-                max_tokens=1500   # Reasonable limit for summary length
+                **self.build_request_body(transcript)
             )
             
             summary = response.choices[0].message.content
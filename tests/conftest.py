@@ -0,0 +1,8 @@
+import pytest
+from meeting_store import MeetingStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = MeetingStore(db_path=str(tmp_path / "meetings.db"), retention_hours=24)
+    yield store
+    store.close()
@@ -0,0 +1,225 @@
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+import pytest
+from batch_summarizer import BatchSummarizer
+from summarizer import MeetingSummarizer
+
+class FakeBatchClient:
+    """Local stand-in for the OpenAI files and batches endpoints."""
+
+    def __init__(self):
+        self.files = SimpleNamespace(
+            create=self._create_file, content=self._file_content, delete=self._delete_file
+        )
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+        self.uploaded = {}
+        self.batch_records = {}
+        self.unreachable_batches = set()
+        self.reject_batches = False
+        self.file_count = 0
+
+    def _store_file(self, content):
+        self.file_count += 1
+        file_id = f"file-{self.file_count}"
+        self.uploaded[file_id] = content
+        return file_id
+
+    async def _create_file(self, file, purpose):
+        return SimpleNamespace(id=self._store_file(file[1].decode("utf-8")))
+
+    async def _delete_file(self, file_id):
+        del self.uploaded[file_id]
+
+    async def _file_content(self, file_id):
+        return SimpleNamespace(text=self.uploaded[file_id])
+
+    async def _create_batch(self, input_file_id, endpoint, completion_window):
+        if self.reject_batches:
+            raise ConnectionError("Batch API unavailable")
+        batch_id = f"batch-{len(self.batch_records) + 1}"
+        self.batch_records[batch_id] = SimpleNamespace(
+            id=batch_id, status="in_progress", input_file_id=input_file_id,
+            output_file_id=None, error_file_id=None
+        )
+        return self.batch_records[batch_id]
+
+    async def _retrieve_batch(self, batch_id):
+        if batch_id in self.unreachable_batches:
+            raise ConnectionError(f"Batch {batch_id} unavailable")
+        return self.batch_records[batch_id]
+
+    def finish(self, batch_id, failed_custom_ids=()):
+        """Complete a batch, answering every request with a summary of its transcript."""
+        batch = self.batch_records[batch_id]
+        output = []
+        for line in self.uploaded[batch.input_file_id].splitlines():
+            request = json.loads(line)
+            if request["custom_id"] in failed_custom_ids:
+                output.append({"custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": "boom"}})
+                continue
+
+            transcript = request["body"]["messages"][-1]["content"].split("\n\n", 1)[1]
+            output.append({"custom_id": request["custom_id"], "error": None, "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": f"Summary of {transcript}"}}]}
+            }})
+
+        batch.status = "completed"
+        batch.output_file_id = self._store_file("\n".join(json.dumps(record) for record in output))
+
+@pytest.fixture
+def client():
+    return FakeBatchClient()
+
+@pytest.fixture
+def batch_summarizer(store, client):
+    return BatchSummarizer(MeetingSummarizer(), store, client=client)
+
+def collect_deliveries(batch_summarizer, poll=None):
+    """Poll batches and return (chat_id, summary) pairs passed to the delivery callback."""
+    delivered = []
+
+    async def deliver(job, summary):
+        delivered.append((job.chat_id, summary))
+
+    asyncio.run((poll or batch_summarizer.poll_batches)(deliver))
+    return delivered
+
+def test_pending_jobs_submitted_as_single_batch(store, client, batch_summarizer):
+    """Test that queued jobs are collected into one batch submission."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    store.add_deferred_job(2, 20, "b.m4a", "second meeting")
+
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+
+    requests = [json.loads(line) for line in client.uploaded["file-1"].splitlines()]
+    assert [request["url"] for request in requests] == ["/v1/chat/completions"] * 2
+    assert requests[0]["body"]["model"] == batch_summarizer.summarizer.model
+    assert store.unsubmitted_jobs() == []
+    assert store.submitted_batch_ids() == [batch_id]
+    assert asyncio.run(batch_summarizer.submit_pending()) is None
+
+def test_results_delivered_when_batch_completes(store, client, batch_summarizer):
+    """Test that summaries are delivered only after the batch finishes."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+
+    assert collect_deliveries(batch_summarizer) == []
+
+    client.finish(batch_id)
+
+    assert collect_deliveries(batch_summarizer) == [(1, "Summary of first meeting")]
+    assert store.submitted_batch_ids() == []
+
+def test_failed_requests_delivered_as_none(store, client, batch_summarizer):
+    """Test that failed batch requests are reported to the chat instead of being lost."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    failed_job_id = store.add_deferred_job(2, 20, "b.m4a", "second meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+
+    client.finish(batch_id, failed_custom_ids={f"job-{failed_job_id}"})
+
+    assert collect_deliveries(batch_summarizer) == [(1, "Summary of first meeting"), (2, None)]
+
+def test_expired_batch_without_output(store, client, batch_summarizer):
+    """Test that jobs of an expired batch are reported as failed."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+    client.batch_records[batch_id].status = "expired"
+
+    assert collect_deliveries(batch_summarizer) == [(1, None)]
+    assert store.submitted_batch_ids() == []
+
+def test_failed_delivery_keeps_job_for_retry(store, client, batch_summarizer):
+    """Test that a summary is not lost when the delivery callback raises."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+    client.finish(batch_id)
+
+    async def failing_deliver(job, summary):
+        raise RuntimeError("Telegram unavailable")
+
+    assert asyncio.run(batch_summarizer.poll_batches(failing_deliver)) == 0
+    assert store.submitted_batch_ids() == [batch_id]
+    assert collect_deliveries(batch_summarizer) == [(1, "Summary of first meeting")]
+    assert store.submitted_batch_ids() == []
+
+def test_unreachable_batch_does_not_block_others(store, client, batch_summarizer):
+    """Test that a batch failing to poll doesn't prevent delivery of other batches."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    broken_batch_id = asyncio.run(batch_summarizer.submit_pending())
+    store.add_deferred_job(2, 20, "b.m4a", "second meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+    client.finish(batch_id)
+    client.unreachable_batches.add(broken_batch_id)
+
+    assert collect_deliveries(batch_summarizer) == [(2, "Summary of second meeting")]
+    assert store.submitted_batch_ids() == [broken_batch_id]
+
+def test_unreachable_batch_given_up_after_max_failures(store, client, batch_summarizer):
+    """Test that chats are notified once a batch keeps failing to poll."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+    client.unreachable_batches.add(batch_id)
+
+    for _ in range(batch_summarizer.MAX_POLL_FAILURES - 1):
+        assert collect_deliveries(batch_summarizer) == []
+
+    assert collect_deliveries(batch_summarizer) == [(1, None)]
+    assert store.submitted_batch_ids() == []
+
+def test_stale_jobs_expired_with_notification(store, batch_summarizer):
+    """Test that deferred transcripts don't outlive retention plus the completion window."""
+    stale_job_id = store.add_deferred_job(1, 10, "old.m4a", "old meeting")
+    store.add_deferred_job(2, 20, "new.m4a", "new meeting")
+    store.connection.execute(
+        "UPDATE deferred_jobs SET created_at = ? WHERE id = ?",
+        (time.time() - 100 * 3600, stale_job_id)
+    )
+    store.connection.commit()
+
+    assert collect_deliveries(batch_summarizer, poll=batch_summarizer.expire_stale_jobs) == [(1, None)]
+    assert [job.chat_id for job in store.unsubmitted_jobs()] == [2]
+
+def test_batch_files_deleted_after_delivery(store, client, batch_summarizer):
+    """Test that transcripts and summaries don't stay in OpenAI storage."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+    client.finish(batch_id)
+
+    async def failing_deliver(job, summary):
+        raise RuntimeError("Telegram unavailable")
+
+    asyncio.run(batch_summarizer.poll_batches(failing_deliver))
+    assert len(client.uploaded) == 2
+
+    collect_deliveries(batch_summarizer)
+    assert client.uploaded == {}
+
+def test_input_file_deleted_when_batch_creation_fails(store, client, batch_summarizer):
+    """Test that a rejected batch doesn't orphan its uploaded transcripts."""
+    store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    client.reject_batches = True
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(batch_summarizer.submit_pending())
+
+    assert client.uploaded == {}
+    assert len(store.unsubmitted_jobs()) == 1
+
+def test_batch_files_deleted_when_jobs_expire(store, client, batch_summarizer):
+    """Test that expiring submitted jobs also removes their batch files."""
+    job_id = store.add_deferred_job(1, 10, "a.m4a", "first meeting")
+    batch_id = asyncio.run(batch_summarizer.submit_pending())
+    client.batch_records[batch_id].status = "expired"
+    store.connection.execute(
+        "UPDATE deferred_jobs SET created_at = ? WHERE id = ?",
+        (time.time() - 100 * 3600, job_id)
+    )
+    store.connection.commit()
+
+    assert collect_deliveries(batch_summarizer, poll=batch_summarizer.expire_stale_jobs) == [(1, None)]
+    assert client.uploaded == {}
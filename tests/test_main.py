@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from telegram.error import BadRequest
+from main import MeetingBot
+from summarizer import MeetingSummarizer
+
+class FakeTelegramBot:
+    """Records sent messages; optionally rejects Markdown like Telegram does for broken markup."""
+
+    def __init__(self, reject_markdown=False):
+        self.reject_markdown = reject_markdown
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if parse_mode and self.reject_markdown:
+            raise BadRequest("Can't parse entities")
+        self.sent.append((chat_id, text, parse_mode))
+
+@pytest.fixture
+def bot(store):
+    # Skip __init__: it validates tokens and builds the Telegram application
+    bot = MeetingBot.__new__(MeetingBot)
+    bot.meeting_store = store
+    bot.summarizer = MeetingSummarizer()
+    return bot
+
+def make_update(chat_id, caption=None):
+    return SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id),
+        message=SimpleNamespace(caption=caption)
+    )
+
+def test_upload_not_deferred_by_default(bot):
+    """Test that uploads are summarized immediately without /later or #later."""
+    assert not bot._is_deferred(make_update(1))
+    assert not bot._is_deferred(make_update(1, "weekly sync"))
+
+def test_later_caption_defers_single_upload(bot):
+    """Test the #later caption flag."""
+    assert bot._is_deferred(make_update(1, "Weekly sync #LATER"))
+    assert not bot._is_deferred(make_update(1))
+
+def test_deferred_mode_applies_to_chat(bot, store):
+    """Test that the /later setting defers uploads of its chat only."""
+    store.set_deferred_mode(1, True)
+
+    assert bot._is_deferred(make_update(1))
+    assert not bot._is_deferred(make_update(2))
+
+def make_summary_request(bot, chat_id, meeting_id, telegram_bot):
+    """Run /summary and return the texts replied through update.message."""
+    replies = []
+
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    update = SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id),
+        message=SimpleNamespace(reply_text=reply_text)
+    )
+    context = SimpleNamespace(args=[str(meeting_id)], bot=telegram_bot)
+    asyncio.run(bot.summary_command(update, context))
+    return replies
+
+def test_summary_command_falls_back_to_plain_text(bot, store):
+    """Test that archived summaries with broken Markdown are still re-served."""
+    meeting_id = store.save_meeting(1, 10, "a.m4a", "transcript", "broken *markdown")
+    telegram_bot = FakeTelegramBot(reject_markdown=True)
+
+    assert make_summary_request(bot, 1, meeting_id, telegram_bot) == []
+    assert len(telegram_bot.sent) == 1
+    chat_id, text, parse_mode = telegram_bot.sent[0]
+    assert chat_id == 1 and "broken *markdown" in text and parse_mode is None
+
+def test_summary_command_reports_store_errors(bot, store):
+    """Test that store failures get an error reply like /search and /recent."""
+    store.close()
+    telegram_bot = FakeTelegramBot()
+
+    replies = make_summary_request(bot, 1, 1, telegram_bot)
+
+    assert len(replies) == 1 and replies[0].startswith("❌")
+    assert telegram_bot.sent == []
+
+def make_job(store):
+    """Queue a deferred job for chat 1 and return it."""
+    store.add_deferred_job(1, 10, "a.m4a", "transcript")
+    return store.unsubmitted_jobs()[-1]
+
+def test_deferred_summary_falls_back_to_plain_text(bot, store):
+    """Test that rejected Markdown is resent as plain text and archived once."""
+    telegram_bot = FakeTelegramBot(reject_markdown=True)
+    bot.application = SimpleNamespace(bot=telegram_bot)
+
+    asyncio.run(bot.deliver_deferred_summary(make_job(store), "broken *markdown"))
+
+    assert "broken *markdown" in telegram_bot.sent[0][1]
+    assert telegram_bot.sent[0][2] is None
+    assert len(store.recent_meetings(1)) == 1
+
+def test_deferred_summary_archive_failure_does_not_raise(bot, store, monkeypatch):
+    """Test that an archive error after sending doesn't make the summary be resent."""
+    telegram_bot = FakeTelegramBot()
+    bot.application = SimpleNamespace(bot=telegram_bot)
+
+    def failing_save(*args):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(store, "save_meeting", failing_save)
+
+    asyncio.run(bot.deliver_deferred_summary(make_job(store), "summary text"))
+
+    assert len(telegram_bot.sent) == 1
+    assert "summary text" in telegram_bot.sent[0][1]
@@ -0,0 +1,74 @@
+import time
+from meeting_store import MeetingStore
+
+def test_search_finds_meeting_by_transcript(store):
+    """Test full-text search over stored transcripts."""
+    meeting_id = store.save_meeting(1, 10, "sync.m4a", "Обсудили бюджет на третий квартал", "Бюджет утвержден")
+    store.save_meeting(1, 10, "retro.m4a", "Ретроспектива спринта", "Улучшить релизы")
+
+    results = store.search(1, "бюджет")
+
+    assert [meeting.id for meeting in results] == [meeting_id]
+    assert "«" in results[0].snippet
+
+def test_search_matches_inflected_forms(store):
+    """Test that inflected Russian words find the base form."""
+    meeting_id = store.save_meeting(1, 10, "sync.m4a", "Бюджет утвердили", "Решение по бюджету")
+
+    assert [meeting.id for meeting in store.search(1, "бюджета")] == [meeting_id]
+    assert [meeting.id for meeting in store.search(1, "утвердил")] == [meeting_id]
+
+def test_search_is_scoped_to_chat(store):
+    """Test that meetings of other chats are not returned."""
+    store.save_meeting(1, 10, "sync.m4a", "roadmap review", "Roadmap approved")
+
+    assert store.search(2, "roadmap") == []
+    assert store.recent_meetings(2) == []
+
+def test_search_ignores_fts_syntax(store):
+    """Test that special characters in user queries don't break the search."""
+    store.save_meeting(1, 10, "sync.m4a", "release plan", "Release on Friday")
+
+    assert len(store.search(1, 'release" (')) == 1
+    assert store.search(1, '"*') == []
+
+def test_recent_meetings_newest_first(store):
+    """Test recent meetings ordering."""
+    first = store.save_meeting(1, 10, "a.m4a", "first", "first summary")
+    second = store.save_meeting(1, 10, "b.m4a", "second", "second summary")
+
+    assert [meeting.id for meeting in store.recent_meetings(1)] == [second, first]
+
+def test_get_meeting_returns_summary(store):
+    """Test that stored summaries can be re-served."""
+    meeting_id = store.save_meeting(1, 10, "sync.m4a", "transcript", "summary text")
+
+    assert store.get_meeting(1, meeting_id).summary == "summary text"
+    assert store.get_meeting(2, meeting_id) is None
+
+def test_expired_meetings_are_hidden_and_cleaned_up(store):
+    """Test retention consistent with file_retention_hours."""
+    meeting_id = store.save_meeting(1, 10, "old.m4a", "archived budget", "old summary")
+    store.connection.execute(
+        "UPDATE meetings SET created_at = ? WHERE id = ?",
+        (time.time() - 25 * 3600, meeting_id)
+    )
+    store.connection.commit()
+
+    assert store.get_meeting(1, meeting_id) is None
+    assert store.search(1, "budget") == []
+    assert store.cleanup_expired() == 1
+    assert store.connection.execute("SELECT count(*) FROM meetings_fts").fetchone()[0] == 0
+
+def test_deferred_mode_persisted_per_chat(store):
+    """Test that the /later setting survives reopening the database."""
+    assert not store.get_deferred_mode(1)
+
+    store.set_deferred_mode(1, True)
+    reopened = MeetingStore(db_path=store.db_path)
+
+    assert reopened.get_deferred_mode(1)
+    assert not reopened.get_deferred_mode(2)
+    reopened.set_deferred_mode(1, False)
+    assert not reopened.get_deferred_mode(1)
+    reopened.close()